@@ -1,25 +1,144 @@
 import os
-import feedparser
-from datetime import datetime
+import asyncio
+from array import array
+import hashlib
+import math
+import random
+import re
+import shutil
+import sqlite3
+import textwrap
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
+from itertools import repeat
+from typing import Optional
 import json
 import logging
-from ollama import Client, ResponseError
+from ollama import AsyncClient, Client, ResponseError
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import Timeout, RequestException
 import sys
+import time
+
+# Prefer the Rust-based parser when installed; it mirrors feedparser's API
+try:
+    import feedparser_rs as feedparser
+except ImportError:
+    import feedparser
+
+# Use orjson for faster JSON decoding and encoding when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def json_loads(data):
+    """Decode JSON bytes."""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def json_dumps(obj):
+    """Encode an object as indented JSON bytes."""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode()
+
+@dataclass(frozen=True)
+class TTSConfig:
+    """Text-to-speech settings."""
+    enabled: bool = False
+    endpoint_url: Optional[str] = None
+    model: str = 'tts-1'
+    voice: str = 'alloy'
+    response_format: str = 'mp3'
+    speed: float = 1.0
+    concurrency: int = 4
+
+@dataclass(frozen=True)
+class Config:
+    """Application settings loaded from config.json."""
+    feeds_file: str
+    removed_feeds_file: str
+    output_folder: str
+    num_articles: int
+    ollama_model: str
+    ollama_ip: str
+    ollama_port: str
+    feed_timeout: float = 30
+    fetch_concurrency: int = 16
+    batch_timeout: float = 600
+    feed_state_file: str = 'feed_state.json'
+    summary_cache_file: str = 'summary_cache.json'
+    embedding_store_file: str = 'summary_embeddings.db'
+    embedding_model: Optional[str] = None
+    similarity_threshold: float = 0.95
+    text_to_speech: TTSConfig = field(default_factory=TTSConfig)
+
+def load_config(file_path):
+    """Load configuration from a JSON file, ignoring unknown keys."""
+    with open(file_path, 'rb') as config_file:
+        data = json_loads(config_file.read())
+    config_keys = {f.name for f in fields(Config)} - {'text_to_speech'}
+    tts_keys = {f.name for f in fields(TTSConfig)}
+    return Config(
+        **{key: value for key, value in data.items() if key in config_keys},
+        text_to_speech=TTSConfig(**{key: value for key, value in (data.get('text_to_speech') or {}).items() if key in tts_keys})
+    )
+
 # Load configuration
-with open('config.json', 'r') as config_file:
-    config = json.load(config_file)
+config = load_config('config.json')
+
+# Prompt used to summarize each article
+SUMMARY_PROMPT = textwrap.dedent("""\
+    ## INSTRUCTION
+
+    Respond with 1-2 sentences that summarize the key message of this article:
+
+    ## ARTICLE
+
+    {content}
 
-# Add default timeout if not present in config
-feed_timeout = config.get('feed_timeout', 30)
+    ## RULES
+
+    - DO NOT INCLUDE ANYTHING OTHER THAN THE SUMMARY IN YOUR RESPONSE
+    - DO NOT ADD ANY TEXT BEFORE OR AFTER THE SUMMARY
+    - ONLY RESPOND WITH THE ARTICLE SUMMARY
+    """)
+
+# Markdown headings and paragraph breaks stripped from text sent to TTS
+TTS_MARKDOWN_PATTERN = re.compile(r'#+|\n{2,}')
+
+# Audio formats whose files can be joined by concatenating them
+CONCATENABLE_AUDIO_FORMATS = {'mp3', 'aac', 'pcm'}
 
-# Initialize Ollama client
-ollama_client = Client(host=f"http://{config['ollama_ip']}:{config['ollama_port']}")
+# Retries for transient network and server errors, with jittered exponential backoff
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 1
+RETRY_MAX_DELAY = 10
+
+# Cached summaries not reused for this many days are dropped, and at most this
+# many of the most recently used summaries are kept
+SUMMARY_CACHE_MAX_AGE_DAYS = 30
+SUMMARY_CACHE_MAX_ENTRIES = 5000
+
+# Shared HTTP session so TCP/TLS connections are reused across requests
+session = requests.Session()
+adapter = HTTPAdapter(pool_connections=config.fetch_concurrency, pool_maxsize=config.fetch_concurrency)
+session.mount('https://', adapter)
+session.mount('http://', adapter)
+
+# Initialize Ollama clients (async client is used for concurrent summarization)
+ollama_host = f"http://{config.ollama_ip}:{config.ollama_port}"
+ollama_client = Client(host=ollama_host)
+async_ollama_client = AsyncClient(host=ollama_host)
+
+# Event loop shared by all async Ollama requests; the async client's connections
+# are bound to the loop they were opened on
+event_loop = asyncio.new_event_loop()
 
 def read_feeds(file_path):
     """Read feed URLs from a file."""
@@ -27,209 +146,537 @@ def read_feeds(file_path):
         with open(file_path, 'r') as file:
             feeds = [line.strip() for line in file if line.strip()]
         if not feeds:
-            logging.error(f"No feeds found in {file_path}")
+            logging.error("No feeds found in %s", file_path)
             sys.exit(1)
         return feeds
     except FileNotFoundError:
-        logging.error(f"Feeds file not found: {file_path}")
+        logging.error("Feeds file not found: %s", file_path)
         sys.exit(1)
 
+def write_atomic(file_path, data):
+    """Write bytes to a file atomically, replacing it only once the data is on disk."""
+    tmp_path = f"{file_path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, file_path)
+
 def write_feeds(file_path, feeds):
     """Write feed URLs to a file."""
-    with open(file_path, 'w') as file:
-        for feed in feeds:
-            file.write(f"{feed}\n")
+    write_atomic(file_path, "".join(f"{feed}\n" for feed in feeds).encode())
 
-def fetch_and_validate_feed(url, num_articles):
-    """Fetch content from an RSS feed, validate and standardize its content."""
+def load_state(file_path):
+    """Load cached state (feed state or summary cache) from a JSON file."""
     try:
-        response = requests.get(url, timeout=feed_timeout)
+        with open(file_path, 'rb') as file:
+            return json_loads(file.read())
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning("Could not read state from %s: %s", file_path, e)
+        return {}
+
+def save_state(file_path, state):
+    """Save cached state to a JSON file."""
+    write_atomic(file_path, json_dumps(state))
+
+def entry_hash(entry, content):
+    """Identify a feed entry by its id, by its link and last update time, or by its title and content."""
+    if entry.get('id'):
+        key = f"id|{entry['id']}"
+    elif entry.get('link') or entry.get('updated'):
+        key = f"link|{entry.get('link', '')}|{entry.get('updated', '')}"
+    else:
+        key = f"content|{entry.get('title', '')}|{content}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+def retry_delay(attempt):
+    """Compute how long to wait before retrying after the given (zero-based) attempt."""
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) + random.uniform(0, RETRY_BASE_DELAY)
+
+def get_feed(url, headers):
+    """Request a feed, retrying on timeouts, connection errors and server errors."""
+    for attempt in range(RETRY_ATTEMPTS):
+        last_attempt = attempt == RETRY_ATTEMPTS - 1
+        try:
+            response = session.get(url, timeout=config.feed_timeout, headers=headers)
+            if response.status_code < 500 or last_attempt:
+                return response
+            logging.info("Server error %s fetching feed %s, retrying", response.status_code, url)
+        except (Timeout, requests.ConnectionError) as e:
+            if last_attempt:
+                raise
+            logging.info("Error fetching feed %s, retrying: %s", url, e)
+        time.sleep(retry_delay(attempt))
+
+def fetch_and_validate_feed(url, num_articles, feed_state):
+    """Fetch content from an RSS feed, validate and standardize its content.
+
+    Returns the articles that have not been summarized in a previous run, an empty
+    list if the feed has no new content, or None if the feed could not be used.
+    """
+    state = feed_state.get(url, {})
+    headers = {}
+    if state.get('etag'):
+        headers['If-None-Match'] = state['etag']
+    if state.get('modified'):
+        headers['If-Modified-Since'] = state['modified']
+
+    try:
+        response = get_feed(url, headers)
+        if response.status_code == 304:
+            logging.info("Feed not modified since last run: %s", url)
+            return []
         response.raise_for_status()
         feed = feedparser.parse(response.content)
         
         # Check if the feed was successfully parsed
         if feed.get('bozo', 0) == 1:
-            logging.warning(f"Error parsing feed {url}: {feed.get('bozo_exception')}")
+            logging.warning("Error parsing feed %s: %s", url, feed.get('bozo_exception'))
             return None
         
+        seen_hashes = set(state.get('article_hashes', []))
+        current_hashes = []
         valid_entries = []
         
         for entry in feed.entries[:num_articles]:
-            content = (entry.get('summary') or 
-                       entry.get('description') or 
-                       entry.get('content', [{}])[0].get('value', '') or 
-                       entry.get('title', ''))
+            content = entry.get('summary') or entry.get('description')
+            if not content:
+                entry_content = entry.get('content')
+                content = entry_content[0].get('value', '') if entry_content else ''
+            if not content:
+                content = entry.get('title', '')
             
             if content.strip():  # Check if there's any non-whitespace content
+                article_hash = entry_hash(entry, content)
+                current_hashes.append(article_hash)
+                if article_hash in seen_hashes:
+                    continue
                 valid_entries.append({
                     'title': entry.get('title', 'Untitled'),
                     'link': entry.get('link', 'No URL available'),
-                    'content': content
+                    'content': content,
+                    'feed_url': url,
+                    'hash': article_hash
                 })
         
-        return valid_entries if valid_entries else None
+        if not current_hashes:
+            return None
+
+        # Only remember hashes of entries still present in the feed; hashes of
+        # newly summarized articles are added once their summaries succeed
+        feed_state[url] = {
+            'etag': response.headers.get('ETag'),
+            'modified': response.headers.get('Last-Modified'),
+            'article_hashes': [h for h in current_hashes if h in seen_hashes]
+        }
+        return valid_entries
     except Timeout:
-        logging.info(f"Timeout occurred while fetching feed: {url}")
+        logging.info("Timeout occurred while fetching feed: %s", url)
         return None
     except RequestException as e:
-        logging.warning(f"Error fetching feed {url}: {str(e)}")
+        logging.warning("Error fetching feed %s: %s", url, e)
         return None
     except Exception as e:
-        logging.warning(f"Unexpected error fetching feed {url}: {str(e)}")
+        logging.warning("Unexpected error fetching feed %s: %s", url, e)
         return None
 
 def ensure_model_available(model):
     """Ensure the specified model is available, attempting to pull if not."""
     try:
-        ollama_client.chat(model=model, messages=[{"role": "user", "content": "Test"}])
+        models = {m['name'] for m in ollama_client.list().get('models', [])}
     except ResponseError as e:
-        if e.status_code == 404:
-            logging.warning(f"Model '{model}' not found. Attempting to pull...")
-            try:
-                ollama_client.pull(model)
-                logging.info(f"Successfully pulled model '{model}'")
-            except Exception as pull_error:
-                logging.error(f"Failed to pull model '{model}': {str(pull_error)}")
-                raise
-        else:
-            logging.error(f"Unexpected error when checking model availability: {str(e)}")
+        logging.error("Unexpected error when checking model availability: %s", e)
+        raise
+
+    # Models without an explicit tag are stored under the "latest" tag
+    if model not in models and f"{model}:latest" not in models:
+        logging.warning("Model '%s' not found. Attempting to pull...", model)
+        try:
+            ollama_client.pull(model)
+            logging.info("Successfully pulled model '%s'", model)
+        except Exception as pull_error:
+            logging.error("Failed to pull model '%s': %s", model, pull_error)
             raise
 
-def summarize_article(article):
-    """Summarize an article using Ollama."""
-    user_prompt = f"""## INSTRUCTION
-    
-    Respond with 1-2 sentences that summarize the key message of this article:
+def build_prompt(article):
+    """Build the summarization prompt for an article."""
+    return SUMMARY_PROMPT.format(content=article['content'])
 
-    ## ARTICLE
-    
-    {article['content']}
-
-    ## RULES
+def format_summary(summary):
+    """Remove any empty lines and ensure proper formatting."""
+    return '\n'.join(filter(None, (line.strip() for line in summary.splitlines())))
 
-    - DO NOT INCLUDE ANYTHING OTHER THAN THE SUMMARY IN YOUR RESPONSE
-    - DO NOT ADD ANY TEXT BEFORE OR AFTER THE SUMMARY
-    - ONLY RESPOND WITH THE ARTICLE SUMMARY
-    """
+async def chat_with_retries(**kwargs):
+    """Send a chat request to Ollama, retrying on server errors."""
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            return await async_ollama_client.chat(**kwargs)
+        except ResponseError as e:
+            if e.status_code < 500 or attempt == RETRY_ATTEMPTS - 1:
+                raise
+            logging.info("Ollama server error, retrying: %s", e)
+        await asyncio.sleep(retry_delay(attempt))
 
+async def summarize_article(article):
+    """Summarize an article using Ollama."""
     try:
-        response = ollama_client.chat(model=config['ollama_model'], messages=[
+        response = await chat_with_retries(model=config.ollama_model, messages=[
             {
                 'role': 'user',
-                'content': user_prompt,
+                'content': build_prompt(article),
             }
         ])
-        summary = response['message']['content']
-        # Remove any empty lines and ensure proper formatting
-        summary_lines = [line.strip() for line in summary.split('\n') if line.strip()]
-        formatted_summary = '\n'.join(summary_lines)
-        return formatted_summary
+        return format_summary(response['message']['content'])
     except ResponseError as e:
-        logging.error(f"Ollama API error: {str(e)}")
+        logging.error("Ollama API error: %s", e)
         return None
     except Exception as e:
-        logging.error(f"Unexpected error during summarization: {str(e)}")
+        logging.error("Unexpected error during summarization: %s", e)
+        return None
+
+async def summarize_articles(articles):
+    """Summarize articles concurrently, returning summaries in the same order."""
+    tasks = [summarize_article(article) for article in articles]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    return [None if isinstance(result, Exception) else result for result in results]
+
+def summarize_articles_batch(articles):
+    """Summarize articles with a single batch request when the Ollama server supports it.
+
+    The batch endpoint is only used when OLLAMA_BATCH_ENABLED=true; otherwise, or if the
+    server does not provide the endpoint, articles are summarized with individual requests.
+    """
+    if articles and os.environ.get('OLLAMA_BATCH_ENABLED', '').lower() == 'true':
+        payload = {
+            'model': config.ollama_model,
+            'requests': [
+                {'messages': [{'role': 'user', 'content': build_prompt(article)}]}
+                for article in articles
+            ],
+            'stream': False,
+        }
+        try:
+            response = session.post(f"{ollama_host}/api/batch/chat", json=payload, timeout=config.batch_timeout)
+            if response.status_code == 404:
+                logging.info("Batch chat endpoint not available. Falling back to individual requests.")
+            else:
+                response.raise_for_status()
+                results = response.json()
+                if not isinstance(results, list) or not all(isinstance(result, dict) for result in results):
+                    raise ValueError("expected a list of responses")
+                if len(results) != len(articles):
+                    raise ValueError(f"expected {len(articles)} responses, got {len(results)}")
+                return [
+                    format_summary(result['message']['content']) if not result.get('error') else None
+                    for result in results
+                ]
+        except (RequestException, ValueError, KeyError, TypeError, AttributeError) as e:
+            logging.warning("Batch summarization failed, falling back to individual requests: %s", e)
+
+    return event_loop.run_until_complete(summarize_articles(articles))
+
+def content_hash(article):
+    """Identify an article by its content."""
+    return hashlib.blake2b(article['content'].encode(), digest_size=16).hexdigest()
+
+def vector_norm(vector):
+    """Compute the Euclidean norm of a vector."""
+    return math.sqrt(sum(x * x for x in vector))
+
+def open_embedding_store(file_path):
+    """Open the SQLite store of embeddings of cached articles."""
+    store = sqlite3.connect(file_path)
+    store.execute(
+        "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, norm REAL NOT NULL, vector BLOB NOT NULL)"
+    )
+    return store
+
+def load_embeddings(embedding_store):
+    """Load cached embeddings as (key, norm, vector) tuples."""
+    return [
+        (key, norm, array('f', vector))
+        for key, norm, vector in embedding_store.execute("SELECT key, norm, vector FROM embeddings")
+    ]
+
+async def embed_articles(articles, model):
+    """Compute embeddings of articles concurrently, with None for articles that fail."""
+    tasks = [async_ollama_client.embeddings(model=model, prompt=article['content']) for article in articles]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    embeddings = []
+    for article, result in zip(articles, results):
+        if isinstance(result, Exception):
+            logging.warning("Failed to embed article '%s': %s", article['title'], result)
+            embeddings.append(None)
+        else:
+            embeddings.append(result['embedding'])
+    return embeddings
+
+def find_similar_summary(summary_cache, cached_embeddings, embedding, threshold):
+    """Find the cached entry most similar to an embedding, if it meets the threshold."""
+    norm = vector_norm(embedding)
+    if not norm:
         return None
+    best_key, best_score = None, threshold
+    for key, cached_norm, vector in cached_embeddings:
+        if cached_norm and key in summary_cache:
+            score = sum(x * y for x, y in zip(embedding, vector)) / (norm * cached_norm)
+            if score >= best_score:
+                best_key, best_score = key, score
+    return summary_cache[best_key] if best_key else None
+
+def summarize_with_cache(articles, summary_cache, embedding_store=None):
+    """Summarize articles, reusing cached summaries of identical or near-identical content.
+
+    Exact matches are found by content hash. If an embedding store is given, articles
+    without an exact match are compared to cached articles by embedding similarity.
+    """
+    today = datetime.now().date().isoformat()
+    keys = [content_hash(article) for article in articles]
+
+    summaries = [None] * len(articles)
+    for index, key in enumerate(keys):
+        entry = summary_cache.get(key)
+        if entry:
+            entry['used'] = today
+            summaries[index] = entry['summary']
+    misses = [index for index, summary in enumerate(summaries) if summary is None]
 
-def text_to_speech(text, output_file, config):
+    embeddings = {}
+    if embedding_store and misses:
+        cached_embeddings = load_embeddings(embedding_store)
+        vectors = event_loop.run_until_complete(
+            embed_articles([articles[index] for index in misses], config.embedding_model)
+        )
+        remaining = []
+        for index, vector in zip(misses, vectors):
+            entry = find_similar_summary(summary_cache, cached_embeddings, vector, config.similarity_threshold) if vector else None
+            if entry:
+                entry['used'] = today
+                summaries[index] = entry['summary']
+            else:
+                remaining.append(index)
+                if vector:
+                    embeddings[index] = vector
+        misses = remaining
+
+    logging.info("Reusing %s cached summaries, summarizing %s article(s)", len(articles) - len(misses), len(misses))
+    new_summaries = summarize_articles_batch([articles[index] for index in misses])
+
+    for index, summary in zip(misses, new_summaries):
+        summaries[index] = summary
+        if summary:
+            summary_cache[keys[index]] = {'summary': summary, 'used': today}
+            if index in embeddings:
+                vector = embeddings[index]
+                embedding_store.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, norm, vector) VALUES (?, ?, ?)",
+                    (keys[index], vector_norm(vector), array('f', vector).tobytes())
+                )
+    if embedding_store:
+        embedding_store.commit()
+    return summaries
+
+def prune_summary_cache(summary_cache, embedding_store=None):
+    """Drop cached summaries that have not been used recently, along with their embeddings."""
+    cutoff = (datetime.now() - timedelta(days=SUMMARY_CACHE_MAX_AGE_DAYS)).date().isoformat()
+    by_recency = sorted(summary_cache, key=lambda key: summary_cache[key].get('used', ''), reverse=True)
+    for index, key in enumerate(by_recency):
+        if index >= SUMMARY_CACHE_MAX_ENTRIES or summary_cache[key].get('used', '') < cutoff:
+            del summary_cache[key]
+
+    if embedding_store:
+        stale_keys = [
+            (key,) for (key,) in embedding_store.execute("SELECT key FROM embeddings") if key not in summary_cache
+        ]
+        embedding_store.executemany("DELETE FROM embeddings WHERE key = ?", stale_keys)
+        embedding_store.commit()
+
+def text_to_speech(text, output_file, tts_config):
     """Convert text to speech using the specified TTS API."""
-    tts_config = config.get('text_to_speech', {})
-    url = tts_config.get('endpoint_url')
+    url = tts_config.endpoint_url
     
     if not url:
         logging.error("TTS endpoint URL not provided in config.")
         return False
 
     payload = {
-        "model": tts_config.get('model', 'tts-1'),
+        "model": tts_config.model,
         "input": text,
-        "voice": tts_config.get('voice', 'alloy'),
-        "response_format": tts_config.get('response_format', 'mp3'),
-        "speed": tts_config.get('speed', 1.0)
+        "voice": tts_config.voice,
+        "response_format": tts_config.response_format,
+        "speed": tts_config.speed
     }
 
     try:
-        # Use POST request here
-        response = requests.post(url, json=payload, headers={"Content-Type": "application/json"})
-        response.raise_for_status()
-        with open(output_file, 'wb') as f:
-            f.write(response.content)
-        logging.info(f"Audio file saved to {output_file}")
+        # Stream the audio straight to disk instead of holding it in memory
+        headers = {"Content-Type": "application/json", "Accept-Encoding": "identity"}
+        with session.post(url, json=payload, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            with open(output_file, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    f.write(chunk)
+        logging.info("Audio file saved to %s", output_file)
         return True
     except requests.RequestException as e:
-        logging.error(f"Failed to generate speech: {e}")
+        logging.error("Failed to generate speech: %s", e)
         return False
 
+def generate_audio_summary(texts, output_file, tts_config):
+    """Convert texts to speech concurrently and join them into a single audio file.
+
+    Texts that fail to convert are left out. Formats that cannot be joined by
+    concatenation are converted with a single request.
+    """
+    if tts_config.response_format not in CONCATENABLE_AUDIO_FORMATS:
+        return text_to_speech("\n".join(texts), output_file, tts_config)
+
+    part_files = [f"{output_file}.part{index}" for index in range(len(texts))]
+    try:
+        with ThreadPoolExecutor(max_workers=tts_config.concurrency) as executor:
+            results = list(executor.map(text_to_speech, texts, part_files, repeat(tts_config)))
+        if not any(results):
+            return False
+
+        with open(output_file, 'wb') as output:
+            for part_file, converted in zip(part_files, results):
+                if converted:
+                    with open(part_file, 'rb') as part:
+                        shutil.copyfileobj(part, output, 64 * 1024)
+        return True
+    finally:
+        for part_file in part_files:
+            if os.path.exists(part_file):
+                os.remove(part_file)
+
 def main():
-    feeds_file = config['feeds_file']
-    removed_feeds_file = config['removed_feeds_file']
-    output_folder = os.path.expanduser(config['output_folder'])
-    num_articles = config['num_articles']
+    feeds_file = config.feeds_file
+    removed_feeds_file = config.removed_feeds_file
+    output_folder = os.path.expanduser(config.output_folder)
+    num_articles = config.num_articles
+    feed_state_file = config.feed_state_file
+    summary_cache_file = config.summary_cache_file
 
     os.makedirs(output_folder, exist_ok=True)
 
     try:
-        ensure_model_available(config['ollama_model'])
+        ensure_model_available(config.ollama_model)
+        if config.embedding_model:
+            ensure_model_available(config.embedding_model)
     except Exception:
         logging.error("Failed to ensure model availability. Exiting.")
         return
 
     feeds = read_feeds(feeds_file)
+    feed_state = load_state(feed_state_file)
+    summary_cache = load_state(summary_cache_file)
+    embedding_store = open_embedding_store(config.embedding_store_file) if config.embedding_model else None
     removed_feeds = []
-    summaries = []
-    tts_summaries = []
 
+    # Fetch all feeds concurrently, then process them in their original order
+    feed_articles = {}
+    with ThreadPoolExecutor(max_workers=config.fetch_concurrency) as executor:
+        futures = {executor.submit(fetch_and_validate_feed, url, num_articles, feed_state): url for url in feeds}
+        for future in as_completed(futures):
+            feed_articles[futures[future]] = future.result()
+
+    all_articles = []
     for feed_url in feeds:
-        logging.info(f"Processing feed: {feed_url}")
-        articles = fetch_and_validate_feed(feed_url, num_articles)
-
-        if articles:
-            for article in articles:
-                summary = summarize_article(article)
-                if summary:
-                    summaries.append(f"## {article['title']}\n\n{summary}\n\n{article['link']}\n\n")
-                    tts_summaries.append(f"{article['title']}. {summary}")
-                else:
-                    logging.warning(f"Failed to summarize article: {article['title']}")
-        else:
-            logging.warning(f"No valid content found for feed: {feed_url}")
+        logging.info("Processing feed: %s", feed_url)
+        articles = feed_articles[feed_url]
+
+        if articles is None:
+            logging.warning("No valid content found for feed: %s", feed_url)
             removed_feeds.append(feed_url)
+            feed_state.pop(feed_url, None)
+        elif articles:
+            all_articles.extend(articles)
+        else:
+            logging.info("No new articles in feed: %s", feed_url)
+
+    # Summarize all uncached articles in one batch, or concurrently if batching is unavailable;
+    # the Ollama server schedules concurrent requests according to OLLAMA_NUM_PARALLEL
+    article_summaries = summarize_with_cache(all_articles, summary_cache, embedding_store)
 
-    # Update feeds files
-    write_feeds(feeds_file, [f for f in feeds if f not in removed_feeds])
-    write_feeds(removed_feeds_file, removed_feeds)
+    # Record which articles were summarized; failed articles make sure the feed is
+    # downloaded again next run so they are retried
+    for article, summary in zip(all_articles, article_summaries):
+        if summary:
+            feed_state[article['feed_url']]['article_hashes'].append(article['hash'])
+        else:
+            logging.warning("Failed to summarize article: %s", article['title'])
+            feed_state[article['feed_url']].update(etag=None, modified=None)
+
+    new_summaries = [
+        (article, summary) for article, summary in zip(all_articles, article_summaries) if summary
+    ]
 
     # Get current date and format it
     current_date = datetime.now()
     formatted_date = current_date.strftime("%A, %B %d, %Y")
-    
-    # Write summaries to file
     output_file = os.path.join(output_folder, f"{current_date.strftime('%Y-%m-%d')}_feed-summaries.md")
-    with open(output_file, 'w') as file:
-        file.write(f"# News for {formatted_date}\n\n")
-        file.write("\n".join(summaries))
-
-    logging.info(f"Summaries written to {output_file}")
-    if removed_feeds:
-        logging.info(f"Removed {len(removed_feeds)} feed(s) due to lack of content")
-
-    # Generate speech if enabled in config
-    if config.get('text_to_speech', {}).get('enabled', False):
-        clean_tts_summaries = []
-        for text_content in tts_summaries:
-            # Strip markdown from text_content
-            clean_tts_summaries.append(text_content.replace("#", "").replace("##", "").replace("###", "").replace("\n\n", " "))
-            
-        tts_str = f"News for {formatted_date}:\n\n" + "\n".join(clean_tts_summaries)
-        audio_file = os.path.join(output_folder, f"{current_date.strftime('%Y-%m-%d')}_feed-summaries.mp3")
-        if text_to_speech(tts_str, audio_file, config):
-            logging.info(f"Audio summary generated: {audio_file}")
-            # Add a link to the audio file in the markdown summary
-            with open(output_file, 'a') as file:
-                file.write(f"[Listen to the audio summary]({os.path.basename(audio_file)})")
-            logging.info(f"Added audio link to {output_file}")
+
+    # Later runs on the same day append to the day's file, so their audio gets its
+    # own time-stamped file instead of replacing the earlier run's audio
+    file_exists = os.path.exists(output_file)
+    audio_name = current_date.strftime('%Y-%m-%d_%H%M%S' if file_exists else '%Y-%m-%d')
+    audio_file = os.path.join(output_folder, f"{audio_name}_feed-summaries.mp3")
+
+    with ThreadPoolExecutor(max_workers=1) as tts_executor:
+        # Generate speech in the background while the markdown and state files are
+        # written, if enabled in config and this run produced new summaries
+        tts_future = None
+        if config.text_to_speech.enabled and new_summaries:
+            # Strip markdown from the summaries in a single pass each
+            clean_tts_summaries = [
+                TTS_MARKDOWN_PATTERN.sub(lambda m: ' ' if m.group().startswith('\n') else '', f"{article['title']}. {summary}")
+                for article, summary in new_summaries
+            ]
+
+            tts_texts = [f"News for {formatted_date}:"] + clean_tts_summaries
+            tts_future = tts_executor.submit(generate_audio_summary, tts_texts, audio_file, config.text_to_speech)
+
+        # Write summaries to file, appending to the day's file if an earlier run created it
+        if new_summaries:
+            with open(output_file, 'a' if file_exists else 'w', buffering=64 * 1024) as file:
+                if file_exists:
+                    file.write("\n\n")
+                else:
+                    file.write(f"# News for {formatted_date}\n\n")
+
+                for article, summary in new_summaries:
+                    file.write(f"## {article['title']}\n\n{summary}\n\n{article['link']}\n\n")
+            logging.info("Summaries written to %s", output_file)
         else:
-            logging.warning("Failed to generate audio summary")
+            logging.info("No new summaries to write")
+
+        # Update feeds files
+        removed_set = set(removed_feeds)
+        write_feeds(feeds_file, [f for f in feeds if f not in removed_set])
+        write_feeds(removed_feeds_file, removed_feeds)
+        save_state(feed_state_file, feed_state)
+        prune_summary_cache(summary_cache, embedding_store)
+        save_state(summary_cache_file, summary_cache)
+        if embedding_store:
+            embedding_store.close()
+
+        if removed_feeds:
+            logging.info("Removed %s feed(s) due to lack of content", len(removed_feeds))
+
+        if tts_future:
+            if tts_future.result():
+                logging.info("Audio summary generated: %s", audio_file)
+                # Add a link to the audio file in the markdown summary
+                with open(output_file, 'a') as file:
+                    file.write(f"[Listen to the audio summary]({os.path.basename(audio_file)})")
+                logging.info("Added audio link to %s", output_file)
+            else:
+                logging.warning("Failed to generate audio summary")
 
 if __name__ == "__main__":
     try: